@@ -1,4 +1,5 @@
 from PIL import Image
+from concurrent.futures import ThreadPoolExecutor
 import os
 import subprocess
 
@@ -11,22 +12,43 @@ TILES = [
 TOKTX = r"C:\Program Files\KTX-Software\bin\toktx.exe"
 OUT_ARRAY = "assets/texture_array.ktx2"
 
-# Save all tiles as separate files (they must be same dimensions)
-temp_tiles = []
-for i, path in enumerate(TILES):
+def convert(i, path):
     img = Image.open(path).convert("RGBA")
     temp_path = f"temp_tile_{i}.png"
     img.save(temp_path)
-    temp_tiles.append(temp_path)
+    return temp_path
+
+# Opening only reads the header, so size and mode checks don't decode pixels
+# RGBA PNGs are passed to toktx as is, everything else is re-encoded
+sizes = set()
+to_convert = []
+for i, path in enumerate(TILES):
+    with Image.open(path) as img:
+        sizes.add(img.size)
+        if img.mode != "RGBA" or img.format != "PNG":
+            to_convert.append(i)
+if len(sizes) != 1:
+    raise RuntimeError(f"tiles must all be the same size, got {sorted(sizes)}")
+
+# Decode and PNG encode release the GIL so tiles convert in parallel
+with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+    temp_tiles = list(executor.map(convert, to_convert, [TILES[i] for i in to_convert]))
+layer_tiles = list(TILES)
+for i, temp_path in zip(to_convert, temp_tiles):
+    layer_tiles[i] = temp_path
 
 # Create texture array with mipmaps
+# UASTC + zstd is GPU transcodable, bevy needs the basis-universal feature to load it
 cmd = [
     TOKTX,
     "--genmipmap",
+    "--encode", "uastc",
+    "--uastc_quality", "2",
+    "--zcmp", "18",
     "--layers", str(len(TILES)),
     "--t2",
     OUT_ARRAY,
-] + temp_tiles
+] + layer_tiles
 
 print("Running:", " ".join(cmd))
 subprocess.run(cmd, check=True)
@@ -1,113 +1,174 @@
+import os
+import sys
+import matplotlib
+# Skip GUI toolkit startup entirely when nobody will see the window
+HEADLESS = not sys.stdout.isatty() or os.environ.get('HEADLESS', '').lower() not in ('', '0', 'false')
+if HEADLESS:
+    matplotlib.use('Agg')
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
 import pandas as pd
 import glob
-import os
 import numpy as np
-import sys
+import multiprocessing
+import re
+import importlib.util
+if importlib.util.find_spec('pyarrow') is not None:
+    CSV_OPTIONS = {'engine': 'pyarrow'}
+else:
+    # memory_map is only supported by the c engine
+    CSV_OPTIONS = {'engine': 'c', 'memory_map': True}
+THROUGHPUT_COLS = ['time_seconds', 'chunks_per_second', 'entity_chunks_per_second']
+QUEUE_SIZE_COLS = ['time_seconds', 'queue_size']
+# float32 time is plenty for x positions and 1 second buckets, the metric
+# columns stay exact so the printed averages don't drift
+THROUGHPUT_DTYPES = {'time_seconds': np.float32, 'chunks_per_second': np.float64, 'entity_chunks_per_second': np.float64}
+QUEUE_SIZE_DTYPES = {'time_seconds': np.float32, 'queue_size': np.int64}
+THREAD_FILE_PATTERN = re.compile(r'_(\d+)\.csv$')
 plt.style.use('dark_background')
-data_folder = sys.argv[1] if len(sys.argv) > 1 else 'plots/latest'
-if not data_folder.startswith('plots/'):
-    data_folder = f'plots/{data_folder}'
-throughput_files = sorted(glob.glob(f'{data_folder}/throughput_thread_*.csv'), key=lambda x: int(x.split('_')[-1].split('.')[0]))
-queue_size_files = sorted(glob.glob(f'{data_folder}/queue_size_thread_*.csv'), key=lambda x: int(x.split('_')[-1].split('.')[0]))
-if not throughput_files or not queue_size_files:
-    print(f"Error: No data files found in {data_folder}")
-    sys.exit(1)
-fig, (ax0, ax1, ax2, ax3) = plt.subplots(4, 1, figsize=(14, 16))
-fig.patch.set_facecolor('#1a1a1a')
-ax0.set_facecolor('#2a2a2a')
-ax1.set_facecolor('#2a2a2a')
-ax2.set_facecolor('#2a2a2a')
-ax3.set_facecolor('#2a2a2a')
-colors = plt.cm.plasma([i / len(throughput_files) for i in range(len(throughput_files))])
-all_chunks_per_second = []
-all_times = []
-all_dfs = []
-for i, file in enumerate(throughput_files):
-    df = pd.read_csv(file)
-    all_dfs.append(df)
-if all_dfs:
-    time_sum_dict = {}
-    for df in all_dfs:
-        for _, row in df.iterrows():
-            t_rounded = round(row['time_seconds'])
-            if t_rounded not in time_sum_dict:
-                time_sum_dict[t_rounded] = []
-            time_sum_dict[t_rounded].append(row['chunks_per_second'])
-    times = sorted(time_sum_dict.keys())
-    totals = [sum(time_sum_dict[t]) for t in times]
-    ax0.plot(times, totals, color='#00d4ff', linestyle='-', linewidth=2, label='Total Chunks/sec', alpha=0.9)
-    overall_avg = np.mean(totals)
-    ax0.axhline(y=overall_avg, color='#00ff00', linestyle='--', linewidth=2, label=f'Average: {overall_avg:.2f}', alpha=0.7)
-    x_min, x_max = ax0.get_xlim()
-    ax0.text(x_min, overall_avg, f'{overall_avg:.1f}', color='#00ff00', fontsize=10, ha='left', va='bottom', bbox=dict(boxstyle='round,pad=0.3', facecolor='#2a2a2a', edgecolor='#00ff00', alpha=0.8))
-    ax0.text(x_max, overall_avg, f'{overall_avg:.1f}', color='#00ff00', fontsize=10, ha='right', va='bottom', bbox=dict(boxstyle='round,pad=0.3', facecolor='#2a2a2a', edgecolor='#00ff00', alpha=0.8))
-ax0.set_xlabel('Time (seconds)', fontsize=12, color='white')
-ax0.set_ylabel('Total Chunks per Second', fontsize=12, color='white')
-ax0.set_title('Total Chunk Generation Throughput (All Threads Combined)', fontsize=14, color='white', pad=20)
-ax0.legend(loc='center left', bbox_to_anchor=(1, 0.5), framealpha=0.9, facecolor='#2a2a2a', edgecolor='#444444')
-ax0.grid(True, alpha=0.2, color='white')
-ax0.tick_params(colors='white')
-for i, file in enumerate(throughput_files):
-    thread_num = int(file.split('_')[-1].split('.')[0])
-    df = pd.read_csv(file)
-    ax1.plot(df['time_seconds'], df['chunks_per_second'], label=f'Thread {thread_num}', color=colors[i], linewidth=1.5, alpha=0.8)
-    all_chunks_per_second.extend(df['chunks_per_second'].values)
-if all_chunks_per_second:
-    overall_avg = np.mean(all_chunks_per_second)
-    ax1.axhline(y=overall_avg, color='#00ff00', linestyle='--', linewidth=2, label=f'Overall Average: {overall_avg:.2f}', alpha=0.7)
-    x_min, x_max = ax1.get_xlim()
-    ax1.text(x_min, overall_avg, f'{overall_avg:.1f}', color='#00ff00', fontsize=10, ha='left', va='bottom', bbox=dict(boxstyle='round,pad=0.3', facecolor='#2a2a2a', edgecolor='#00ff00', alpha=0.8))
-    ax1.text(x_max, overall_avg, f'{overall_avg:.1f}', color='#00ff00', fontsize=10, ha='right', va='bottom', bbox=dict(boxstyle='round,pad=0.3', facecolor='#2a2a2a', edgecolor='#00ff00', alpha=0.8))
-ax1.set_xlabel('Time (seconds)', fontsize=12, color='white')
-ax1.set_ylabel('Chunks per Second', fontsize=12, color='white')
-ax1.set_title('Chunk Generation Throughput per Thread', fontsize=14, color='white', pad=20)
-ax1.legend(loc='center left', bbox_to_anchor=(1, 0.5), framealpha=0.9, facecolor='#2a2a2a', edgecolor='#444444')
-ax1.grid(True, alpha=0.2, color='white')
-ax1.tick_params(colors='white')
-all_queue_sizes = []
-queue_dfs = []
-for i, file in enumerate(queue_size_files):
-    thread_num = int(file.split('_')[-1].split('.')[0])
-    df = pd.read_csv(file)
-    ax2.plot(df['time_seconds'], df['queue_size'], label=f'Thread {thread_num}', color=colors[i], linewidth=1.5, alpha=0.8)
-    all_queue_sizes.extend(df['queue_size'].values)
-    queue_dfs.append(df)
-if all_queue_sizes:
-    overall_avg = np.mean(all_queue_sizes)
-    ax2.axhline(y=overall_avg, color='#00ff00', linestyle='--', linewidth=2, label=f'Overall Average: {overall_avg:.2f}', alpha=0.7)
-    x_min, x_max = ax2.get_xlim()
-    ax2.text(x_min, overall_avg, f'{overall_avg:.1f}', color='#00ff00', fontsize=10, ha='left', va='bottom', bbox=dict(boxstyle='round,pad=0.3', facecolor='#2a2a2a', edgecolor='#00ff00', alpha=0.8))
-    ax2.text(x_max, overall_avg, f'{overall_avg:.1f}', color='#00ff00', fontsize=10, ha='right', va='bottom', bbox=dict(boxstyle='round,pad=0.3', facecolor='#2a2a2a', edgecolor='#00ff00', alpha=0.8))
-ax2.set_xlabel('Time (seconds)', fontsize=12, color='white')
-ax2.set_ylabel('Priority Queue Size', fontsize=12, color='white')
-ax2.set_title('Priority Queue Size per Thread', fontsize=14, color='white', pad=20)
-ax2.legend(loc='center left', bbox_to_anchor=(1, 0.5), framealpha=0.9, facecolor='#2a2a2a', edgecolor='#444444')
-ax2.grid(True, alpha=0.2, color='white')
-ax2.tick_params(colors='white')
-all_entity_chunks = []
-entity_dfs = []
-for i, file in enumerate(throughput_files):
-    thread_num = int(file.split('_')[-1].split('.')[0])
-    df = pd.read_csv(file)
-    ax3.plot(df['time_seconds'], df['entity_chunks_per_second'], label=f'Thread {thread_num}', color=colors[i], linewidth=1.5, alpha=0.8)
-    all_entity_chunks.extend(df['entity_chunks_per_second'].values)
-    entity_dfs.append(df)
-if all_entity_chunks:
-    overall_avg = np.mean(all_entity_chunks)
-    ax3.axhline(y=overall_avg, color='#00ff00', linestyle='--', linewidth=2, label=f'Overall Average: {overall_avg:.2f}', alpha=0.7)
-    x_min, x_max = ax3.get_xlim()
-    ax3.text(x_min, overall_avg, f'{overall_avg:.1f}', color='#00ff00', fontsize=10, ha='left', va='bottom', bbox=dict(boxstyle='round,pad=0.3', facecolor='#2a2a2a', edgecolor='#00ff00', alpha=0.8))
-    ax3.text(x_max, overall_avg, f'{overall_avg:.1f}', color='#00ff00', fontsize=10, ha='right', va='bottom', bbox=dict(boxstyle='round,pad=0.3', facecolor='#2a2a2a', edgecolor='#00ff00', alpha=0.8))
-ax3.set_xlabel('Time (seconds)', fontsize=12, color='white')
-ax3.set_ylabel('Entity Chunks per Second', fontsize=12, color='white')
-ax3.set_title('Chunks with Entities (Mesh) Generation Rate per Thread', fontsize=14, color='white', pad=20)
-ax3.legend(loc='center left', bbox_to_anchor=(1, 0.5), framealpha=0.9, facecolor='#2a2a2a', edgecolor='#444444')
-ax3.grid(True, alpha=0.2, color='white')
-ax3.tick_params(colors='white')
-plt.tight_layout()
-os.makedirs(data_folder, exist_ok=True)
-output_file = f'{data_folder}/chunk_metrics.png'
-plt.savefig(output_file, dpi=300, facecolor='#1a1a1a', edgecolor='none', bbox_inches='tight')
-print(f"Generated {output_file}")
-plt.show()
\ No newline at end of file
+
+def thread_num_of(path):
+    return int(THREAD_FILE_PATTERN.search(path).group(1))
+
+def render(fig, output_file):
+    fig.savefig(output_file, dpi=300, facecolor='#1a1a1a', edgecolor='none', bbox_inches='tight')
+    print(f"Generated {output_file}")
+
+def plot_metrics(data_folder):
+    if not data_folder.startswith('plots/'):
+        data_folder = f'plots/{data_folder}'
+    throughput_files = sorted(glob.glob(f'{data_folder}/throughput_thread_*.csv'), key=thread_num_of)
+    queue_size_files = sorted(glob.glob(f'{data_folder}/queue_size_thread_*.csv'), key=thread_num_of)
+    if not throughput_files or not queue_size_files:
+        return None
+    fig, (ax0, ax1, ax2, ax3) = plt.subplots(4, 1, figsize=(14, 16))
+    fig.patch.set_facecolor('#1a1a1a')
+    ax0.set_facecolor('#2a2a2a')
+    ax1.set_facecolor('#2a2a2a')
+    ax2.set_facecolor('#2a2a2a')
+    ax3.set_facecolor('#2a2a2a')
+    colors = plt.cm.plasma([i / len(throughput_files) for i in range(len(throughput_files))])
+    all_chunks_per_second = []
+    throughput_dfs = [pd.read_csv(f, usecols=THROUGHPUT_COLS, dtype=THROUGHPUT_DTYPES, **CSV_OPTIONS) for f in throughput_files]
+    queue_size_dfs = [pd.read_csv(f, usecols=QUEUE_SIZE_COLS, dtype=QUEUE_SIZE_DTYPES, **CSV_OPTIONS) for f in queue_size_files]
+    big = pd.concat(throughput_dfs, ignore_index=True)
+    big['t'] = big['time_seconds'].round().astype(np.int64)
+    agg = big.groupby('t', sort=True)['chunks_per_second'].sum()
+    times, totals = agg.index.to_numpy(), agg.to_numpy()
+    # Fixed limits up front so plotting doesn't recompute data limits per artist
+    # Header-only CSVs leave nothing to fix limits on, so autoscale is kept
+    all_times = np.concatenate([df['time_seconds'].to_numpy() for df in throughput_dfs + queue_size_dfs])
+    if all_times.size:
+        t_max = np.nanmax(all_times) or 1
+        for ax, values in (
+            (ax0, totals),
+            (ax1, np.concatenate([df['chunks_per_second'].to_numpy() for df in throughput_dfs])),
+            (ax2, np.concatenate([df['queue_size'].to_numpy() for df in queue_size_dfs])),
+            (ax3, np.concatenate([df['entity_chunks_per_second'].to_numpy() for df in throughput_dfs])),
+        ):
+            y_max = np.nanmax(values) if values.size else 0
+            ax.set_xlim(0, t_max * 1.02)
+            ax.set_ylim(0, (y_max or 1) * 1.05)
+            ax.set_autoscale_on(False)
+    if len(totals):
+        ax0.plot(times, totals, color='#00d4ff', linestyle='-', linewidth=2, label='Total Chunks/sec', alpha=0.9)
+        overall_avg = np.mean(totals)
+        ax0.axhline(y=overall_avg, color='#00ff00', linestyle='--', linewidth=2, label=f'Average: {overall_avg:.2f}', alpha=0.7)
+        x_min, x_max = ax0.get_xlim()
+        ax0.text(x_min, overall_avg, f'{overall_avg:.1f}', color='#00ff00', fontsize=10, ha='left', va='bottom', bbox=dict(boxstyle='round,pad=0.3', facecolor='#2a2a2a', edgecolor='#00ff00', alpha=0.8))
+        ax0.text(x_max, overall_avg, f'{overall_avg:.1f}', color='#00ff00', fontsize=10, ha='right', va='bottom', bbox=dict(boxstyle='round,pad=0.3', facecolor='#2a2a2a', edgecolor='#00ff00', alpha=0.8))
+    ax0.set_xlabel('Time (seconds)', fontsize=12, color='white')
+    ax0.set_ylabel('Total Chunks per Second', fontsize=12, color='white')
+    ax0.set_title('Total Chunk Generation Throughput (All Threads Combined)', fontsize=14, color='white', pad=20)
+    ax0.legend(loc='center left', bbox_to_anchor=(1, 0.5), framealpha=0.9, facecolor='#2a2a2a', edgecolor='#444444')
+    ax0.grid(True, alpha=0.2, color='white')
+    ax0.tick_params(colors='white')
+    ax1_handles = []
+    for i, file in enumerate(throughput_files):
+        thread_num = thread_num_of(file)
+        df = throughput_dfs[i]
+        ax1_handles.append(Line2D([], [], label=f'Thread {thread_num}', color=colors[i], linewidth=1.5, alpha=0.8))
+        all_chunks_per_second.extend(df['chunks_per_second'].values)
+    ax1.add_collection(LineCollection([np.column_stack([df['time_seconds'], df['chunks_per_second']]) for df in throughput_dfs], colors=colors, linewidths=1.5, alpha=0.8), autolim=False)
+    if all_chunks_per_second:
+        overall_avg = np.mean(all_chunks_per_second)
+        ax1.axhline(y=overall_avg, color='#00ff00', linestyle='--', linewidth=2, label=f'Overall Average: {overall_avg:.2f}', alpha=0.7)
+        x_min, x_max = ax1.get_xlim()
+        ax1.text(x_min, overall_avg, f'{overall_avg:.1f}', color='#00ff00', fontsize=10, ha='left', va='bottom', bbox=dict(boxstyle='round,pad=0.3', facecolor='#2a2a2a', edgecolor='#00ff00', alpha=0.8))
+        ax1.text(x_max, overall_avg, f'{overall_avg:.1f}', color='#00ff00', fontsize=10, ha='right', va='bottom', bbox=dict(boxstyle='round,pad=0.3', facecolor='#2a2a2a', edgecolor='#00ff00', alpha=0.8))
+    ax1.set_xlabel('Time (seconds)', fontsize=12, color='white')
+    ax1.set_ylabel('Chunks per Second', fontsize=12, color='white')
+    ax1.set_title('Chunk Generation Throughput per Thread', fontsize=14, color='white', pad=20)
+    ax1.legend(handles=ax1_handles + ax1.get_legend_handles_labels()[0], loc='center left', bbox_to_anchor=(1, 0.5), framealpha=0.9, facecolor='#2a2a2a', edgecolor='#444444')
+    ax1.grid(True, alpha=0.2, color='white')
+    ax1.tick_params(colors='white')
+    all_queue_sizes = []
+    ax2_handles = []
+    for i, file in enumerate(queue_size_files):
+        thread_num = thread_num_of(file)
+        df = queue_size_dfs[i]
+        ax2_handles.append(Line2D([], [], label=f'Thread {thread_num}', color=colors[i], linewidth=1.5, alpha=0.8))
+        all_queue_sizes.extend(df['queue_size'].values)
+    ax2.add_collection(LineCollection([np.column_stack([df['time_seconds'], df['queue_size']]) for df in queue_size_dfs], colors=colors[:len(queue_size_dfs)], linewidths=1.5, alpha=0.8), autolim=False)
+    if all_queue_sizes:
+        overall_avg = np.mean(all_queue_sizes)
+        ax2.axhline(y=overall_avg, color='#00ff00', linestyle='--', linewidth=2, label=f'Overall Average: {overall_avg:.2f}', alpha=0.7)
+        x_min, x_max = ax2.get_xlim()
+        ax2.text(x_min, overall_avg, f'{overall_avg:.1f}', color='#00ff00', fontsize=10, ha='left', va='bottom', bbox=dict(boxstyle='round,pad=0.3', facecolor='#2a2a2a', edgecolor='#00ff00', alpha=0.8))
+        ax2.text(x_max, overall_avg, f'{overall_avg:.1f}', color='#00ff00', fontsize=10, ha='right', va='bottom', bbox=dict(boxstyle='round,pad=0.3', facecolor='#2a2a2a', edgecolor='#00ff00', alpha=0.8))
+    ax2.set_xlabel('Time (seconds)', fontsize=12, color='white')
+    ax2.set_ylabel('Priority Queue Size', fontsize=12, color='white')
+    ax2.set_title('Priority Queue Size per Thread', fontsize=14, color='white', pad=20)
+    ax2.legend(handles=ax2_handles + ax2.get_legend_handles_labels()[0], loc='center left', bbox_to_anchor=(1, 0.5), framealpha=0.9, facecolor='#2a2a2a', edgecolor='#444444')
+    ax2.grid(True, alpha=0.2, color='white')
+    ax2.tick_params(colors='white')
+    all_entity_chunks = []
+    ax3_handles = []
+    for i, file in enumerate(throughput_files):
+        thread_num = thread_num_of(file)
+        df = throughput_dfs[i]
+        ax3_handles.append(Line2D([], [], label=f'Thread {thread_num}', color=colors[i], linewidth=1.5, alpha=0.8))
+        all_entity_chunks.extend(df['entity_chunks_per_second'].values)
+    ax3.add_collection(LineCollection([np.column_stack([df['time_seconds'], df['entity_chunks_per_second']]) for df in throughput_dfs], colors=colors, linewidths=1.5, alpha=0.8), autolim=False)
+    if all_entity_chunks:
+        overall_avg = np.mean(all_entity_chunks)
+        ax3.axhline(y=overall_avg, color='#00ff00', linestyle='--', linewidth=2, label=f'Overall Average: {overall_avg:.2f}', alpha=0.7)
+        x_min, x_max = ax3.get_xlim()
+        ax3.text(x_min, overall_avg, f'{overall_avg:.1f}', color='#00ff00', fontsize=10, ha='left', va='bottom', bbox=dict(boxstyle='round,pad=0.3', facecolor='#2a2a2a', edgecolor='#00ff00', alpha=0.8))
+        ax3.text(x_max, overall_avg, f'{overall_avg:.1f}', color='#00ff00', fontsize=10, ha='right', va='bottom', bbox=dict(boxstyle='round,pad=0.3', facecolor='#2a2a2a', edgecolor='#00ff00', alpha=0.8))
+    ax3.set_xlabel('Time (seconds)', fontsize=12, color='white')
+    ax3.set_ylabel('Entity Chunks per Second', fontsize=12, color='white')
+    ax3.set_title('Chunks with Entities (Mesh) Generation Rate per Thread', fontsize=14, color='white', pad=20)
+    ax3.legend(handles=ax3_handles + ax3.get_legend_handles_labels()[0], loc='center left', bbox_to_anchor=(1, 0.5), framealpha=0.9, facecolor='#2a2a2a', edgecolor='#444444')
+    ax3.grid(True, alpha=0.2, color='white')
+    ax3.tick_params(colors='white')
+    fig.subplots_adjust(left=0.07, right=0.80, top=0.96, bottom=0.04, hspace=0.45)
+    os.makedirs(data_folder, exist_ok=True)
+    return fig, f'{data_folder}/chunk_metrics.png'
+
+if __name__ == '__main__':
+    # PNG encode at 300 dpi runs in a separate process so it overlaps with
+    # loading and plotting the next folder, one render in flight at a time
+    renderer = None
+    failed = False
+    for data_folder in sys.argv[1:] or ['plots/latest']:
+        result = plot_metrics(data_folder)
+        if result is None:
+            print(f"Error: No data files found in {data_folder}")
+            failed = True
+            continue
+        fig, output_file = result
+        if renderer is not None:
+            renderer.join()
+        renderer = multiprocessing.Process(target=render, args=(fig, output_file))
+        renderer.start()
+        # The renderer has its own copy, only keep figures that will be shown
+        if HEADLESS:
+            plt.close(fig)
+    if not HEADLESS:
+        plt.show()
+    if renderer is not None:
+        renderer.join()
+    if failed:
+        sys.exit(1)
\ No newline at end of file
@@ -1,4 +1,5 @@
 from PIL import Image
+import numpy as np
 import sys
 
 GRID = 3
@@ -10,12 +11,8 @@ if len(sys.argv) != 2:
 path = sys.argv[1]
 
 img = Image.open(path).convert("RGBA")
-w, h = img.size
 
-out = Image.new("RGBA", (w * GRID, h * GRID))
+arr = np.asarray(img)
+out = np.tile(arr, (GRID, GRID, 1))
 
-for y in range(GRID):
-    for x in range(GRID):
-        out.paste(img, (x * w, y * h))
-
-out.show()
+Image.fromarray(out, "RGBA").show()
@@ -1,4 +1,7 @@
 from PIL import Image
+import cv2
+import os
+import shutil
 import sys
 
 if len(sys.argv) != 4:
@@ -12,13 +15,24 @@ try:
 except ValueError:
     raise RuntimeError("SIZE must be an integer")
 
-img = Image.open(inp)
-w, h = img.size
+# Only reads the header, pixels are decoded below when a resize is needed
+with Image.open(inp) as header:
+    w, h = header.size
 
 if w < size or h < size:
     raise RuntimeError(f"image too small: {w}x{h}, need at least {size}x{size}")
 
-img = img.resize((size, size), Image.LANCZOS)
-img.save(outp)
+if w == size and h == size and inp.lower().endswith(".png") and outp.lower().endswith(".png"):
+    # Already the right file in place, nothing to copy
+    if not (os.path.exists(outp) and os.path.samefile(inp, outp)):
+        shutil.copyfile(inp, outp)
+else:
+    img = cv2.imread(inp, cv2.IMREAD_UNCHANGED)
+    if img is None:
+        raise RuntimeError(f"failed to read image: {inp}")
+    interpolation = cv2.INTER_AREA if size < min(w, h) else cv2.INTER_LANCZOS4
+    img = cv2.resize(img, (size, size), interpolation=interpolation)
+    if not cv2.imwrite(outp, img):
+        raise RuntimeError(f"failed to write image: {outp}")
 
 print("saved:", outp)